@@ -0,0 +1,118 @@
+import os
+import argparse
+import multiprocessing as mp
+import resource
+import socket
+import struct
+import time
+from encoder_client import DEFAULT_SOCKET_PATH
+
+# Câu truy vấn mẫu dùng cho benchmark
+SAMPLE_QUERIES = [
+    "a man riding a motorbike on a crowded street",
+    "a news anchor sitting in front of a blue screen",
+    "firefighters spraying water on a burning house",
+    "a group of children playing football in the rain",
+]
+
+
+def rss_mb(pid='self'):
+    """Bộ nhớ RSS hiện tại của một process (MB), đọc từ /proc."""
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    # Dự phòng khi không có /proc: dùng RSS lớn nhất của process hiện tại
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def service_pid(socket_path):
+    """Lấy PID của encoder service đang nghe trên Unix socket (SO_PEERCRED, chỉ có trên Linux)."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    pid, _, _ = struct.unpack('3i', creds)
+    return pid
+
+
+def build_encoder(mode, socket_path, qdrant_url):
+    """Tạo encoder giống một web worker thật: nạp Flask và VectorDB (kèm Qdrant client).
+
+    Như vậy RSS của cả hai mode đều có cùng phần nền mà mỗi worker phải nạp.
+    """
+    import flask  # noqa: F401 - worker thật luôn nạp Flask
+    from vector_database import VectorDB
+
+    db = VectorDB(
+        api=qdrant_url,
+        api_key=os.getenv('QDRANT_API_KEY'),
+        encoder_socket=socket_path if mode == 'service' else None
+    )
+    return db.text_encode
+
+
+def worker(mode, socket_path, qdrant_url, num_requests, barrier, results):
+    encode = build_encoder(mode, socket_path, qdrant_url)
+    encode(SAMPLE_QUERIES[0])  # Khởi động trước khi đo
+    barrier.wait()
+
+    start = time.perf_counter()
+    for i in range(num_requests):
+        encode(SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)])
+    results.put((rss_mb(), time.perf_counter() - start))
+
+
+def run(mode, num_workers, num_requests, socket_path, qdrant_url):
+    ctx = mp.get_context('spawn')
+    barrier = ctx.Barrier(num_workers + 1)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(mode, socket_path, qdrant_url, num_requests, barrier, results))
+        for _ in range(num_workers)
+    ]
+    for process in processes:
+        process.start()
+
+    barrier.wait()
+    start = time.perf_counter()
+    stats = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    rss = [s[0] for s in stats]
+    latency_ms = sum(s[1] for s in stats) / (num_workers * num_requests) * 1000
+    throughput = num_workers * num_requests / elapsed
+    return sum(rss) / len(rss), sum(rss), throughput, latency_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo bộ nhớ mỗi worker và throughput khi tăng số worker")
+    parser.add_argument('--mode', choices=['inprocess', 'service'], default='service',
+                        help="inprocess: mỗi worker tự nạp ALIGN; service: dùng encoder_service.py (cả hai đều nạp Flask + VectorDB)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--requests', type=int, default=100, help="Số request mỗi worker")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+    parser.add_argument('--qdrant', default='http://localhost:6333',
+                        help="Qdrant mà mỗi worker kết nối tới khi khởi tạo VectorDB")
+    parser.add_argument('--service-pid', type=int, default=None,
+                        help="PID của encoder_service.py (mặc định lấy qua SO_PEERCRED của socket)")
+    args = parser.parse_args()
+
+    pid = None
+    if args.mode == 'service':
+        pid = args.service_pid or service_pid(args.socket)
+
+    print(f"Mode: {args.mode}")
+    if pid:
+        print(f"RSS total đã bao gồm process encoder_service.py (PID {pid})")
+    print(f"{'workers':>8} {'RSS/worker (MB)':>16} {'service (MB)':>13} {'RSS total (MB)':>15} {'req/s':>10} {'ms/req':>8}")
+    for num_workers in args.workers:
+        rss_avg, rss_total, throughput, latency_ms = run(args.mode, num_workers, args.requests, args.socket, args.qdrant)
+        # Đo service sau khi chạy để tính cả bộ nhớ dùng khi xử lý request
+        rss_service = rss_mb(pid) if pid else 0.0
+        print(f"{num_workers:>8} {rss_avg:>16.1f} {rss_service:>13.1f} {rss_total + rss_service:>15.1f} {throughput:>10.1f} {latency_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import os
+import queue
+import socket
+import struct
+import numpy as np
+
+# Đường dẫn Unix socket mặc định của encoder service
+DEFAULT_SOCKET_PATH = os.getenv('ENCODER_SOCKET', '/tmp/align_encoder.sock')
+
+# Giao thức nhị phân (big-endian):
+#   request : uint32 số câu, sau đó mỗi câu là uint32 độ dài + bytes UTF-8
+#   response: uint32 số vector, uint32 số chiều, sau đó là ma trận float32 (little-endian)
+_UINT32 = struct.Struct('>I')
+_HEADER = struct.Struct('>II')
+
+# Giới hạn mỗi request để một request lỗi không làm encoder dùng chung cấp phát quá nhiều
+# bộ nhớ hoặc chạy batch quá lớn (truy vấn chuỗi sự kiện chỉ có vài mệnh đề)
+MAX_TEXTS = 16
+MAX_TEXT_BYTES = 4096
+
+
+def recv_exact(sock, size):
+    """Đọc đúng size bytes từ socket, trả về None nếu kết nối đã đóng."""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+
+def pack_texts(texts):
+    if len(texts) > MAX_TEXTS:
+        raise ValueError(f"Tối đa {MAX_TEXTS} câu mỗi request")
+    parts = [_UINT32.pack(len(texts))]
+    for text in texts:
+        encoded = text.encode('utf-8')
+        if len(encoded) > MAX_TEXT_BYTES:
+            raise ValueError(f"Mỗi câu tối đa {MAX_TEXT_BYTES} bytes")
+        parts.append(_UINT32.pack(len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+
+def read_texts(sock):
+    """Đọc một request, trả về None nếu kết nối đóng (kể cả khi đang đọc dở).
+
+    Raise ValueError nếu request vượt giới hạn hoặc không phải UTF-8 hợp lệ.
+    """
+    header = recv_exact(sock, _UINT32.size)
+    if header is None:
+        return None
+    (count,) = _UINT32.unpack(header)
+    if count > MAX_TEXTS:
+        raise ValueError(f"Request có {count} câu, vượt giới hạn {MAX_TEXTS}")
+    texts = []
+    for _ in range(count):
+        header = recv_exact(sock, _UINT32.size)
+        if header is None:
+            return None
+        (length,) = _UINT32.unpack(header)
+        if length > MAX_TEXT_BYTES:
+            raise ValueError(f"Câu dài {length} bytes, vượt giới hạn {MAX_TEXT_BYTES}")
+        body = recv_exact(sock, length)
+        if body is None:
+            return None
+        texts.append(body.decode('utf-8'))
+    return texts
+
+
+def pack_vectors(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype='<f4')
+    return _HEADER.pack(*vectors.shape) + vectors.tobytes()
+
+
+def read_vectors(sock):
+    header = recv_exact(sock, _HEADER.size)
+    if header is None:
+        raise ConnectionError("Encoder service đã đóng kết nối")
+    rows, dim = _HEADER.unpack(header)
+    body = recv_exact(sock, rows * dim * 4)
+    if body is None:
+        raise ConnectionError("Encoder service đã đóng kết nối")
+    return np.frombuffer(body, dtype='<f4').reshape(rows, dim)
+
+
+class EncoderClient:
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, pool_size=4, timeout=30.0):
+        """Client nhẹ gọi encoder service qua Unix socket, giữ sẵn một pool kết nối."""
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _acquire(self):
+        """Lấy kết nối từ pool, trả về (socket, True nếu lấy từ pool)."""
+        try:
+            return self.pool.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def _release(self, sock):
+        try:
+            self.pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+
+    def _request(self, sock, payload):
+        try:
+            sock.sendall(payload)
+            return read_vectors(sock)
+        except Exception:
+            # Kết nối hỏng thì bỏ đi, không trả lại pool
+            sock.close()
+            raise
+
+    def encode_batch(self, texts):
+        """Mã hóa danh sách văn bản thành ma trận vector (numpy float32)."""
+        payload = pack_texts(texts)
+        sock, pooled = self._acquire()
+        try:
+            vectors = self._request(sock, payload)
+        except ConnectionError:
+            # Chỉ thử lại khi kết nối cũ trong pool đã chết (BrokenPipeError, ConnectionResetError
+            # hoặc EOF từ read_vectors) do encoder service khởi động lại. Timeout thì không thử lại,
+            # vì request cũ vẫn đang chờ model_lock và vẫn sẽ được mã hóa.
+            if not pooled:
+                raise
+            sock = self._connect()
+            vectors = self._request(sock, payload)
+        self._release(sock)
+        return vectors
+
+    def encode(self, text):
+        """Mã hóa một câu văn bản thành vector."""
+        return self.encode_batch([text])[0]
+
+    def close(self):
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                break
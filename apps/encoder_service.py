@@ -0,0 +1,72 @@
+import os
+import argparse
+import socketserver
+import threading
+import numpy as np
+import torch
+from transformers import AlignProcessor, AlignModel
+from encoder_client import DEFAULT_SOCKET_PATH, read_texts, pack_vectors
+
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+# Model chỉ được nạp một lần cho tất cả web worker
+processor = AlignProcessor.from_pretrained("kakaobrain/align-base")
+model = AlignModel.from_pretrained("kakaobrain/align-base").to(device)
+model.eval()
+
+# Model không chạy song song an toàn, các request được xử lý lần lượt
+model_lock = threading.Lock()
+
+
+def encode_texts(texts):
+    if not texts:
+        return np.zeros((0, model.config.projection_dim), dtype=np.float32)
+    inputs = processor(text=texts, padding=True, return_tensors="pt").to(device)
+    with model_lock, torch.no_grad():
+        features = model.get_text_features(
+            input_ids=inputs['input_ids'],
+            attention_mask=inputs['attention_mask']
+        )
+    return features.cpu().numpy()
+
+
+class EncoderHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # Mỗi kết nối được giữ lại để client tái sử dụng cho nhiều request
+        while True:
+            try:
+                texts = read_texts(self.request)
+            except ValueError as e:
+                # Request không hợp lệ thì đóng kết nối, không xử lý
+                print(f"⚠️ Đóng kết nối do request không hợp lệ: {e}")
+                break
+            if texts is None:
+                break
+            self.request.sendall(pack_vectors(encode_texts(texts)))
+
+
+class EncoderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder service ALIGN dùng chung qua Unix socket")
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help="Đường dẫn Unix socket")
+    args = parser.parse_args()
+
+    # Xóa socket cũ nếu service trước đó bị dừng đột ngột
+    if os.path.exists(args.socket):
+        os.unlink(args.socket)
+
+    with EncoderServer(args.socket, EncoderHandler) as server:
+        print(f"✅ Encoder service đang chạy trên {args.socket} ({device})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Dừng encoder service...")
+        finally:
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import shutil
+
+bind = "0.0.0.0:5000"
+
+# Thư mục ảnh tạm dùng chung cho mọi worker (giống image_folder trong main.py)
+image_folder = os.path.join('static', 'temporary', 'images')
+
+
+def on_starting(server):
+    """Xóa ảnh tạm một lần trong master, trước khi fork worker, để worker khởi động lại không xóa ảnh của worker khác."""
+    shutil.rmtree(image_folder, ignore_errors=True)
+    os.makedirs(image_folder, exist_ok=True)
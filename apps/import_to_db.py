@@ -74,7 +74,8 @@ def process_json_data(data, keyframes_folder):
         "frame_number": data['frame_number'],
         "pts_time": data['csv_data']['pts_time'],
         "frame_idx": data['csv_data']['frame_idx'],
-        "compressed": data['image_base64']
+        "compressed": data['image_base64'],
+        "thumbnail": data.get('thumbnail_base64')  # JSON cũ có thể chưa có thumbnail
     }
     
     return models.PointStruct(
@@ -1,12 +1,7 @@
 from flask import Flask, render_template, request, redirect, url_for, jsonify, send_from_directory
 from vector_database import VectorDB
-import cv2
 import os
-from PIL import Image
-import base64
-from io import BytesIO
-import torch
-from torchvision import transforms
+import math
 import shutil
 from dotenv import load_dotenv
 
@@ -18,10 +13,18 @@ QDRANT_API_KEY = os.getenv('QDRANT_API_KEY')
 if not QDRANT_API_KEY:
     print("Cảnh báo: QDRANT_API_KEY không được cung cấp trong biến môi trường. Sử dụng giá trị mặc định.")
 
+# Nếu đặt ENCODER_SOCKET thì dùng encoder service chung (apps/encoder_service.py),
+# mỗi worker không phải nạp riêng model ALIGN
+ENCODER_SOCKET = os.getenv('ENCODER_SOCKET')
+
+# Giới hạn số mệnh đề trong một truy vấn chuỗi sự kiện (mỗi mệnh đề là một lượt tìm kiếm)
+MAX_TEMPORAL_CLAUSES = 5
+
 qdrant_manager = VectorDB(
     api='http://aienthusiasm:6333',
     timeout=200.0,
-    api_key=QDRANT_API_KEY
+    api_key=QDRANT_API_KEY,
+    encoder_socket=ENCODER_SOCKET
 )
 
 # Định nghĩa hàm clear_directory trước khi sử dụng
@@ -39,10 +42,6 @@ def clear_directory(directory):
 image_folder = os.path.join('static', 'temporary', 'images')
 os.makedirs(image_folder, exist_ok=True)
 
-# Xóa các file hình ảnh tạm thời khi khởi động
-if os.path.exists(image_folder):
-    clear_directory(image_folder)
-
 @app.route('/')
 def home():
     return render_template('newhome.html')
@@ -60,38 +59,62 @@ def search():
 
     return search_images(query_text)
 
-def process_qdrant_results(qdrant_results):
-    scenes = {}
+def build_frame_metadata(result):
+    video_folder = result.payload['video_folder']
+    frame_number = result.payload['frame_number']
+    thumbnail = result.payload.get('thumbnail')
 
-    for result in qdrant_results:
-        video_folder = result.payload['video_folder']
-        frame_number = result.payload['frame_number']
-        frame_idx = result.payload['frame_idx']
-        pts_time = result.payload['pts_time']
-        compressed = result.payload['compressed']
+    # Ảnh gốc chỉ được tải khi người dùng mở frame (xem route /frame)
+    frame_path = url_for('frame', point_id=result.id)
 
+    if thumbnail:
         # Tạo đường dẫn tương đối với static_url_path
-        output_path = os.path.join('temporary', 'images', f"{video_folder}_{frame_number}.jpg").replace('\\', '/')
+        output_path = os.path.join('temporary', 'images', f"{video_folder}_{frame_number}_thumb.jpg").replace('\\', '/')
         full_path = os.path.join('static', output_path)
-        qdrant_manager.decode_and_decompress_image(compressed, full_path)
+        if not os.path.exists(full_path):
+            qdrant_manager.save_image_bytes(thumbnail, full_path)
 
         # Sử dụng URL tương đối với static_url_path
-        relative_path = f"/static/{output_path}"
-        
-        scene_identifier = (video_folder, frame_number)
+        thumbnail_path = f"/static/{output_path}"
+    else:
+        # Dữ liệu import trước khi có thumbnail thì dùng ảnh gốc
+        thumbnail_path = frame_path
+
+    return {
+        'video_folder': video_folder,
+        'frame_number': frame_number,
+        'frame_idx': result.payload['frame_idx'],
+        'pts_time': result.payload['pts_time'],
+        'frame_path': frame_path,
+        'thumbnail_path': thumbnail_path
+    }
+
+def process_qdrant_results(qdrant_results):
+    scenes = {}
+
+    for result in qdrant_results:
+        scene_identifier = (result.payload['video_folder'], result.payload['frame_number'])
         if scene_identifier not in scenes:
             scenes[scene_identifier] = {
-                'metadata': {
-                    'video_folder': video_folder,
-                    'frame_number': frame_number,
-                    'frame_idx': frame_idx,
-                    'pts_time': pts_time,
-                    'frame_path': relative_path
-                }
+                'metadata': build_frame_metadata(result)
             }
 
     return scenes
 
+@app.route('/frame/<uuid:point_id>')
+def frame(point_id):
+    filename = f"{point_id}.jpg"
+    full_path = os.path.join(image_folder, filename)
+
+    if not os.path.exists(full_path):
+        point = qdrant_manager.get_frame(str(point_id))
+        if point is None:
+            return jsonify({'error': 'Frame not found'}), 404
+        if not qdrant_manager.save_image_bytes(point.payload['compressed'], full_path):
+            return jsonify({'error': 'Failed to load frame'}), 500
+
+    return send_from_directory(image_folder, filename)
+
 @app.route('/search_images', methods=['GET', 'POST'])
 def search_images(query_text=None):
     if request.method == 'GET':
@@ -110,11 +133,46 @@ def search_images(query_text=None):
 
     metadata_list = [scene['metadata'] for scene in scenes.values()]
     frame_paths = [scene['metadata']['frame_path'] for scene in scenes.values()]
+    thumbnail_paths = [scene['metadata']['thumbnail_path'] for scene in scenes.values()]
 
     return jsonify({
         'frame_paths': frame_paths,
+        'thumbnail_paths': thumbnail_paths,
         'metadata_list': metadata_list,
     })
 
+@app.route('/search_temporal', methods=['GET', 'POST'])
+def search_temporal():
+    # Các mệnh đề truyền theo thứ tự: ?query=A&query=B&max_gap=10
+    clauses = [clause.strip() for clause in request.values.getlist('query') if clause.strip()]
+    if not clauses:
+        return jsonify({'error': 'At least one query clause is required'}), 400
+    if len(clauses) > MAX_TEMPORAL_CLAUSES:
+        return jsonify({'error': f'At most {MAX_TEMPORAL_CLAUSES} query clauses are allowed'}), 400
+
+    try:
+        max_gap = float(request.values.get('max_gap', 10))
+    except ValueError:
+        return jsonify({'error': 'max_gap must be a number of seconds'}), 400
+    if not math.isfinite(max_gap) or max_gap <= 0:
+        return jsonify({'error': 'max_gap must be a positive, finite number of seconds'}), 400
+
+    sequences = qdrant_manager.query_temporal(clauses, max_gap=max_gap)
+    if not sequences:
+        return jsonify({'error': 'No matching sequences found. Try a different query or a larger gap.'}), 404
+
+    return jsonify({
+        'sequences': [
+            {
+                'score': sequence['score'],
+                'metadata_list': [build_frame_metadata(result) for result in sequence['frames']]
+            }
+            for sequence in sequences
+        ]
+    })
+
 if __name__ == "__main__":
+    # Xóa các file hình ảnh tạm thời khi khởi động (chạy bằng gunicorn thì xem gunicorn.conf.py),
+    # không xóa khi import vì các worker dùng chung thư mục này
+    clear_directory(image_folder)
     app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
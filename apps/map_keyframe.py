@@ -1,5 +1,6 @@
 import os
 import base64
+import io
 import json
 import pandas as pd
 import torch
@@ -37,8 +38,10 @@ else:
     with open(checkpoint_file, 'r') as f:
         processed_subfolders = json.load(f)
 
-# Kích thước mới cho ảnh sau khi resize để lưu vào JSON
-new_size = (640, 360)
+# Kích thước, định dạng và chất lượng của thumbnail lưu vào JSON cạnh ảnh gốc
+new_size = (320, 180)
+thumbnail_format = 'JPEG'
+thumbnail_quality = 75
 
 # Khởi tạo mô hình ALIGN
 processor = AlignProcessor.from_pretrained("kakaobrain/align-base")
@@ -53,7 +56,13 @@ def extract_features_from_original_images(images):
 
 # Hàm resize ảnh nhưng không lưu lại vào thư mục, chỉ để chuyển sang Base64
 def resize_image(image, size):
-    return image.resize(size)
+    return image.resize(size, Image.LANCZOS)
+
+# Hàm nén thumbnail thành Base64 để lưu vào JSON
+def encode_thumbnail(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format=thumbnail_format, quality=thumbnail_quality, optimize=True)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
 
 # Hàm xử lý ảnh song song bằng ThreadPoolExecutor
 def process_images_in_parallel(current_batch, new_size):
@@ -61,19 +70,19 @@ def process_images_in_parallel(current_batch, new_size):
         processed_images = list(executor.map(lambda item: process_image(item[0], new_size), current_batch))
     return processed_images
 
-# Hàm xử lý một ảnh (resize cho JSON và giữ nguyên ảnh gốc cho trích xuất đặc trưng)
+# Hàm xử lý một ảnh (tạo thumbnail cho JSON và giữ nguyên ảnh gốc cho trích xuất đặc trưng)
 def process_image(img_path, new_size):
     try:
         image = Image.open(img_path).convert('RGB')  # Đọc ảnh gốc 1280x720
-        resized_image = resize_image(image, new_size)  # Resize để lưu vào JSON
-        return resized_image
+        resized_image = resize_image(image, new_size)  # Resize thành thumbnail để lưu vào JSON
+        return encode_thumbnail(resized_image)
     except Exception as e:
         print(f"Lỗi khi xử lý ảnh {img_path}: {str(e)}")
         return None
 
 # Hàm kiểm tra cấu trúc JSON
 def validate_json_structure(data):
-    required_fields = ['video_folder', 'frame_number', 'csv_data', 'image_base64', 'vector']
+    required_fields = ['video_folder', 'frame_number', 'csv_data', 'image_base64', 'thumbnail_base64', 'vector']
     csv_required_fields = ['pts_time', 'frame_idx']
     
     # Kiểm tra các trường chính
@@ -246,13 +255,13 @@ for keyframes_folder in os.listdir(image_base_folder):
                                         images = [Image.open(item[0]).convert('RGB') for item in current_batch]
                                         features = extract_features_from_original_images(images)
 
-                                        # Xử lý batch song song (resize chỉ để lưu vào JSON)
+                                        # Xử lý batch song song (tạo thumbnail để lưu vào JSON)
                                         processed_images = process_images_in_parallel(current_batch, new_size)
 
                                         # Tạo dữ liệu batch để lưu
                                         data_batch = []
-                                        for (img_path, frame_number, row), feature, resized_image in zip(current_batch, features, processed_images):
-                                            if resized_image is None:
+                                        for (img_path, frame_number, row), feature, thumbnail_base64 in zip(current_batch, features, processed_images):
+                                            if thumbnail_base64 is None:
                                                 continue
 
                                             with open(img_path, "rb") as image_file:  # Đọc lại ảnh gốc từ đường dẫn gốc
@@ -263,6 +272,7 @@ for keyframes_folder in os.listdir(image_base_folder):
                                                 "video_folder": lxx_vxxx_folder,  # Thêm video_folder vào JSON
                                                 "frame_number": frame_number,
                                                 "image_base64": image_base64,  # Lưu ảnh gốc vào JSON
+                                                "thumbnail_base64": thumbnail_base64,  # Thumbnail dùng cho lưới kết quả
                                                 "image_filename": os.path.basename(img_path),
                                                 "csv_data": {
                                                     "pts_time": row['pts_time'],
@@ -305,12 +315,12 @@ for keyframes_folder in os.listdir(image_base_folder):
                             images = [Image.open(item[0]).convert('RGB') for item in current_batch]
                             features = extract_features_from_original_images(images)
 
-                            # Xử lý batch song song (resize chỉ để lưu vào JSON)
+                            # Xử lý batch song song (tạo thumbnail để lưu vào JSON)
                             processed_images = process_images_in_parallel(current_batch, new_size)
 
                             data_batch = []
-                            for (img_path, frame_number, row), feature, resized_image in zip(current_batch, features, processed_images):
-                                if resized_image is None:
+                            for (img_path, frame_number, row), feature, thumbnail_base64 in zip(current_batch, features, processed_images):
+                                if thumbnail_base64 is None:
                                     continue
 
                                 with open(img_path, "rb") as image_file:
@@ -321,6 +331,7 @@ for keyframes_folder in os.listdir(image_base_folder):
                                     "video_folder": lxx_vxxx_folder,  # Đúng tên video folder
                                     "frame_number": frame_number,
                                     "image_base64": image_base64,
+                                    "thumbnail_base64": thumbnail_base64,
                                     "image_filename": os.path.basename(img_path),
                                     "csv_data": {
                                         "pts_time": row['pts_time'],
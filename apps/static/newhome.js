@@ -6,6 +6,7 @@ document.addEventListener("DOMContentLoaded", function () {
     };
 
     let allFrames = [];
+    let allThumbnails = [];
     let allMetadata = [];
     let searchType = 'image';
 
@@ -81,14 +82,15 @@ document.addEventListener("DOMContentLoaded", function () {
         }
     
         allFrames = data.frame_paths || [];
+        allThumbnails = data.thumbnail_paths || allFrames;
         allMetadata = data.metadata_list || [];
         console.log("Processed data - Frames:", allFrames.length, "Metadata:", allMetadata.length);
     
-        displayImageResults(allFrames, allMetadata);
+        displayImageResults(allFrames, allThumbnails, allMetadata);
     }
 
     //hiển thị kết quả tìm kiếm ảnh
-    function displayImageResults(frames, metadata) {
+    function displayImageResults(frames, thumbnails, metadata) {
         const searchResultsContainer = document.getElementById('search-results');
         console.log("Displaying image results - Frames:", frames.length, "Metadata:", metadata.length);
         
@@ -99,8 +101,14 @@ document.addEventListener("DOMContentLoaded", function () {
                 const container = document.createElement('div');
                 container.className = 'image-container';
         
+                // Lưới chỉ tải thumbnail khi cuộn tới, ảnh gốc được tải khi click
+                const thumbnailPath = thumbnails[index] || framePath;
                 const img = document.createElement('img');
-                img.src = framePath;
+                img.src = thumbnailPath;
+                img.loading = 'lazy';
+                img.decoding = 'async';
+                img.width = 320;
+                img.height = 180;
                 img.alt = 'Frame Image';
                 img.className = 'clickable-frame';
                 img.addEventListener('click', () => {
@@ -108,7 +116,7 @@ document.addEventListener("DOMContentLoaded", function () {
                     showFrameModal(framePath, frames);
                 });
                 img.onerror = function() {
-                    console.error('Failed to load image:', framePath);
+                    console.error('Failed to load image:', thumbnailPath);
                     this.src = '/static/placeholder.jpg';
                     this.onerror = null;  // Prevent infinite loop
                 };
@@ -188,7 +196,7 @@ document.addEventListener("DOMContentLoaded", function () {
             <p><strong>PTS Time:</strong> ${metadata.pts_time}</p>
             <h3>Frame:</h3>
             <div class="frames">
-                <img src="${metadata.frame_path}" alt="Frame Image" class="clickable-frame">
+                <img src="${metadata.thumbnail_path || metadata.frame_path}" alt="Frame Image" class="clickable-frame">
             </div>
         `;
         
@@ -198,7 +206,7 @@ document.addEventListener("DOMContentLoaded", function () {
         
         const frame = infoDetails.querySelector('.clickable-frame');
         frame.addEventListener('click', function() {
-            showFrameModal(this.src, [this.src]);
+            showFrameModal(metadata.frame_path, [metadata.frame_path]);
         });
     }
 
@@ -1,23 +1,28 @@
 import numpy as np
-import torch
 from PIL import Image
 import base64
 import io
+import os
 import gzip
+import tempfile
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import PointStruct, Distance, Filter, FieldCondition, MatchValue
-from transformers import AlignProcessor, AlignModel
+from qdrant_client.http.models import PointStruct, Distance, Filter, FieldCondition, MatchValue, PayloadSelectorExclude, SearchRequest
+from encoder_client import EncoderClient
 import logging
 
 class VectorDB:
-    def __init__(self, api='http://aienthusiasm:6333', timeout=200.0, device="cuda:0" if torch.cuda.is_available() else "cpu", api_key= None):
-        """Initialize QdrantImageModule with host, port, and processing mode (local or api)."""
-        self.device = device
+    def __init__(self, api='http://aienthusiasm:6333', timeout=200.0, device=None, api_key= None, encoder_socket=None):
+        """Initialize QdrantImageModule with host, port, and processing mode (local or api).
+
+        Nếu có encoder_socket thì văn bản được mã hóa bởi encoder service dùng chung,
+        worker không nạp ALIGN/torch vào bộ nhớ.
+        """
         self.api_url = api
         self.timeout = timeout
         self.api_key = api_key
+        self.encoder = None
 
-        # Khởi tạo Qdrant Client
+        # Khởi tạo Qdrant Client (dùng lại pool kết nối HTTP cho mọi request)
         self.client = QdrantClient(
             url=self.api_url,
             api_key=self.api_key,
@@ -33,6 +38,17 @@ class VectorDB:
             print(f"❌ Không thể kết nối đến Qdrant: {e}")
             raise
 
+        if encoder_socket:
+            self.encoder = EncoderClient(encoder_socket)
+            print(f"✅ Sử dụng encoder service tại {encoder_socket}")
+            return
+
+        # Chỉ import torch/transformers khi mã hóa ngay trong process
+        import torch
+        from transformers import AlignProcessor, AlignModel
+
+        self.device = device or ("cuda:0" if torch.cuda.is_available() else "cpu")
+
         # Model xử lý hình ảnh ALIGN
         self.processor_align = AlignProcessor.from_pretrained("kakaobrain/align-base")
         self.model_align = AlignModel.from_pretrained("kakaobrain/align-base").to(self.device)
@@ -43,6 +59,10 @@ class VectorDB:
 
     def text_encode(self, text):
         """Mã hóa văn bản thành vector."""
+        if self.encoder:
+            return self.encoder.encode(text).tolist()
+
+        import torch
         processed_text = self.processor_align(text=text, return_tensors="pt").to(self.device)
         with torch.no_grad():
             text_features = self.model_align.get_text_features(
@@ -51,6 +71,20 @@ class VectorDB:
             ).cpu().numpy().flatten()
         return text_features.tolist()
 
+    def text_encode_batch(self, texts):
+        """Mã hóa nhiều câu văn bản thành vector trong một lần chạy model."""
+        if self.encoder:
+            return self.encoder.encode_batch(texts).tolist()
+
+        import torch
+        processed_text = self.processor_align(text=texts, padding=True, return_tensors="pt").to(self.device)
+        with torch.no_grad():
+            text_features = self.model_align.get_text_features(
+                input_ids=processed_text['input_ids'],
+                attention_mask=processed_text['attention_mask']
+            ).cpu().numpy()
+        return text_features.tolist()
+
     def query_dataset(self, query_text=None):
         """Tìm kiếm dữ liệu trong dataset bằng văn bản hoặc hình ảnh."""
         if not query_text:
@@ -65,13 +99,90 @@ class VectorDB:
             qdrant_results = self.client.search(
                 collection_name="dataset",
                 query_vector=vector,
-                limit=150
+                limit=150,
+                # Không tải ảnh gốc cho lưới kết quả, chỉ lấy khi người dùng mở ảnh
+                with_payload=PayloadSelectorExclude(exclude=["compressed"])
             )
             return qdrant_results
         except Exception as e:
             print(f"❌ Lỗi khi truy vấn dataset: {e}")
             return []
 
+    def get_frame(self, point_id):
+        """Lấy payload đầy đủ (kèm ảnh gốc) của một frame theo id."""
+        try:
+            points = self.client.retrieve(
+                collection_name="dataset",
+                ids=[point_id],
+                with_payload=True,
+                with_vectors=False
+            )
+            return points[0] if points else None
+        except Exception as e:
+            print(f"❌ Lỗi khi lấy frame {point_id}: {e}")
+            return None
+
+    def query_temporal(self, clauses, max_gap=10.0, limit=150, top_k=50):
+        """Tìm chuỗi sự kiện "A rồi B ..." trong cùng một video, mỗi bước cách nhau tối đa max_gap giây."""
+        if not clauses:
+            raise ValueError("Cần cung cấp ít nhất một câu truy vấn")
+
+        vectors = self.text_encode_batch(list(clauses))
+
+        try:
+            batch_results = self.client.search_batch(
+                collection_name="dataset",
+                requests=[
+                    SearchRequest(
+                        vector=vector,
+                        limit=limit,
+                        with_payload=PayloadSelectorExclude(exclude=["compressed"])
+                    )
+                    for vector in vectors
+                ]
+            )
+        except Exception as e:
+            print(f"❌ Lỗi khi truy vấn dataset: {e}")
+            return []
+
+        if any(not results for results in batch_results):
+            return []
+
+        # Mã hóa video_folder thành số nguyên để so khớp bằng numpy
+        video_codes = {}
+        videos, times, scores = [], [], []
+        for results in batch_results:
+            videos.append(np.array([video_codes.setdefault(r.payload['video_folder'], len(video_codes)) for r in results]))
+            times.append(np.array([float(r.payload['pts_time']) for r in results]))
+            scores.append(np.array([r.score for r in results]))
+
+        # Quy hoạch động: best[j] là tổng điểm tốt nhất của chuỗi kết thúc tại ứng viên j của mệnh đề hiện tại
+        best = scores[0]
+        backpointers = []
+        for k in range(1, len(batch_results)):
+            gap = times[k][None, :] - times[k - 1][:, None]
+            valid = (videos[k - 1][:, None] == videos[k][None, :]) & (gap > 0) & (gap <= max_gap)
+            chained = np.where(valid, best[:, None], -np.inf)
+            prev = chained.argmax(axis=0)
+            best = chained[prev, np.arange(len(prev))] + scores[k]
+            backpointers.append(prev)
+
+        # Xếp hạng các chuỗi theo điểm trung bình của các mệnh đề
+        order = np.argsort(-best)
+        sequences = []
+        for j in order[:top_k]:
+            if not np.isfinite(best[j]):
+                break
+            indices = [j]
+            for prev in reversed(backpointers):
+                indices.append(prev[indices[-1]])
+            indices.reverse()
+            sequences.append({
+                'score': float(best[j]) / len(batch_results),
+                'frames': [batch_results[k][i] for k, i in enumerate(indices)]
+            })
+        return sequences
+
     def _get_query_vector(self, query_text):
         """Xác định vector tìm kiếm dựa vào văn bản hoặc hình ảnh."""
         if query_text:
@@ -87,3 +198,24 @@ class VectorDB:
             logging.info(f"✅ Ảnh đã được lưu thành công tại {output_path}")
         except Exception as e:
             logging.error(f"❌ Lỗi khi giải mã và lưu ảnh: {e}")
+
+    def save_image_bytes(self, base64_str, output_path):
+        """Ghi nguyên bytes JPEG đã lưu ra file, không giải nén/nén lại.
+
+        Ghi vào file tạm cùng thư mục rồi os.replace, để request khác không đọc phải file đang ghi dở.
+        """
+        try:
+            image_bytes = base64.b64decode(base64_str)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(image_bytes)
+                os.replace(tmp_path, output_path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            logging.info(f"✅ Ảnh đã được lưu thành công tại {output_path}")
+            return True
+        except Exception as e:
+            logging.error(f"❌ Lỗi khi lưu ảnh: {e}")
+            return False